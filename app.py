@@ -1,10 +1,18 @@
-import json
+import functools
+import hashlib
 import os
-from typing import Dict, List, Optional, Tuple
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 
 import docker
+import ijson
+import orjson
 import requests
-from flask import Flask, jsonify, render_template_string, request
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from flask import Flask, Response, jsonify, request
 
 app = Flask(__name__)
 
@@ -15,7 +23,72 @@ UNIFI_SITE = os.environ.get("UNIFI_SITE", "default")
 UNIFI_NETWORK_ID = os.environ.get("UNIFI_NETWORK_ID") or ""
 VERIFY_SSL = os.environ.get("VERIFY_SSL", "false").lower() == "true"
 UNIFI_API_KEY = os.environ.get("UNIFI_API_KEY") or ""
+# Docker network the mapped containers live on (e.g. br0); empty lists every container.
+DOCKER_NETWORK = os.environ.get("DOCKER_NETWORK") or ""
 REQUEST_TIMEOUT = int(os.environ.get("REQUEST_TIMEOUT", "30"))
+# UniFi only refreshes client stats every ~30s, so fresher reads buy nothing.
+CACHE_TTL = float(os.environ.get("CACHE_TTL", "20"))
+# Cookie logins stay valid far longer than a request; re-login after this many seconds.
+SESSION_TTL = float(os.environ.get("SESSION_TTL", "600"))
+# Background refresh cadence for the status snapshot; 0 disables the refresher.
+REFRESH_SEC = float(os.environ.get("REFRESH_SEC", "15"))
+
+# Docker and UniFi are independent I/O; overlap them per request.
+_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+# Bulk approvals get their own bounded pool so a large batch can't queue
+# /api/status behind its writes.
+_BULK_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
+# Process-wide result cache: {key: (expiry, value)}.
+_CACHE: Dict[str, Tuple[float, object]] = {}
+# Bumped by invalidate() so a call already in flight can't re-store stale data.
+_CACHE_GEN: Dict[str, int] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def ttl_cache(seconds: float) -> Callable:
+    """Memoize a function's result for `seconds`, keyed on the function name.
+
+    Arguments are ignored for the key; the wrapped functions read global state
+    (Docker, the single configured controller), so any call returns the same data.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        key = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            now = time.monotonic()
+            with _CACHE_LOCK:
+                hit = _CACHE.get(key)
+                gen = _CACHE_GEN.get(key, 0)
+            if hit and hit[0] > now:
+                return hit[1]
+            value = func(*args, **kwargs)
+            with _CACHE_LOCK:
+                if _CACHE_GEN.get(key, 0) == gen:
+                    _CACHE[key] = (time.monotonic() + seconds, value)
+            return value
+
+        def invalidate() -> None:
+            with _CACHE_LOCK:
+                _CACHE.pop(key, None)
+                _CACHE_GEN[key] = _CACHE_GEN.get(key, 0) + 1
+
+        wrapper.invalidate = invalidate
+        return wrapper
+
+    return decorator
+
+
+def _dumps(obj) -> bytes:
+    """Serialize a request body with orjson (much faster than stdlib json)."""
+    return orjson.dumps(obj)
+
+
+def normalize_mac(mac: str) -> str:
+    """Lowercase a MAC once at ingest so every later lookup uses the stored form."""
+    return mac.lower()
 
 
 def ensure_configured() -> Optional[str]:
@@ -40,20 +113,100 @@ def build_session() -> _TimeoutSession:
             "Content-Type": "application/json",
             "Accept": "application/json",
             "X-Requested-With": "XMLHttpRequest",
+            # rest/user is large JSON; ask for it compressed over a reused connection.
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
         }
     )
     if UNIFI_API_KEY:
         session.headers.update({"X-API-KEY": UNIFI_API_KEY})
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        # Retry only connect failures and gateway 5xx. read=0 keeps a hung
+        # controller at one REQUEST_TIMEOUT, and raise_on_status=False hands the
+        # last 5xx back to raise_for_status() so callers still see UniFi's status/body.
+        max_retries=Retry(
+            total=2,
+            read=0,
+            backoff_factor=0.3,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "PUT"}),
+            raise_on_status=False,
+        ),
+    )
+    session.mount(UNIFI_HOST, adapter)
     return session
 
 
+_SESSION: Optional[_TimeoutSession] = None
+_SESSION_LOGIN_TIME = 0.0
+_SESSION_LOCK = threading.Lock()
+# Whether the controller also wants the Network app login; None until the
+# first UniFi call with a password session tells us.
+_NEEDS_NETWORK_LOGIN: Optional[bool] = None
+
+
+def get_session() -> _TimeoutSession:
+    """Return the shared logged-in session, re-authenticating once it is stale."""
+    global _SESSION, _SESSION_LOGIN_TIME
+    with _SESSION_LOCK:
+        if _SESSION is None or time.monotonic() - _SESSION_LOGIN_TIME > SESSION_TTL:
+            session = build_session()
+            if UNIFI_API_KEY:
+                session._auth_mode = "apikey"
+            else:
+                login(session)
+                session._auth_mode = "user"
+                if _NEEDS_NETWORK_LOGIN:
+                    try:
+                        login_network(session)
+                        session._auth_mode = "user+network"
+                    except Exception:
+                        # If network login fails but main login succeeded, continue; errors bubble later.
+                        pass
+            _SESSION = session
+            _SESSION_LOGIN_TIME = time.monotonic()
+        return _SESSION
+
+
+def invalidate_session() -> None:
+    global _SESSION
+    with _SESSION_LOCK:
+        _SESSION = None
+
+
+def with_session(func: Callable, *args):
+    """Call `func(session, *args)`, logging in again once if UniFi answers 401.
+
+    A password session that works on its own records that the Network app
+    login is unnecessary; one that gets a 401 enables it for the retry.
+    """
+    global _NEEDS_NETWORK_LOGIN
+    session = get_session()
+    learning = session._auth_mode == "user" and _NEEDS_NETWORK_LOGIN is None
+    try:
+        result = func(session, *args)
+    except requests.HTTPError as exc:
+        if exc.response is None or exc.response.status_code != 401:
+            raise
+    else:
+        if learning:
+            _NEEDS_NETWORK_LOGIN = False
+        return result
+    if learning:
+        _NEEDS_NETWORK_LOGIN = True
+    invalidate_session()
+    return func(get_session(), *args)
+
+
 def login(session: requests.Session) -> None:
     if UNIFI_API_KEY:
         # API key auth path skips cookie login.
         return
     resp = session.post(
         f"{UNIFI_HOST}/api/auth/login",
-        data=json.dumps({"username": UNIFI_USERNAME, "password": UNIFI_PASSWORD}),
+        data=_dumps({"username": UNIFI_USERNAME, "password": UNIFI_PASSWORD}),
     )
     resp.raise_for_status()
     # Some UniFi OS versions require the CSRF token header on subsequent writes.
@@ -82,42 +235,108 @@ def login_network(session: requests.Session) -> None:
         headers["X-CSRF-Token"] = csrf
     resp = session.post(
         f"{UNIFI_HOST}/proxy/network/api/login",
-        data=json.dumps({"username": UNIFI_USERNAME, "password": UNIFI_PASSWORD}),
+        data=_dumps({"username": UNIFI_USERNAME, "password": UNIFI_PASSWORD}),
         headers=headers,
     )
     # Some controllers return 200 with body ok; if 401/403 we raise to bubble up.
     resp.raise_for_status()
 
 
-def fetch_clients(session: requests.Session) -> Dict[str, dict]:
-    resp = session.get(f"{UNIFI_HOST}/proxy/network/api/s/{UNIFI_SITE}/rest/user")
+# Fields of a UniFi rest/user row that the mapper uses.
+CLIENT_FIELDS = ("_id", "mac", "name", "hostname", "fixed_ip", "use_fixedip", "network_id", "network")
+
+
+@ttl_cache(CACHE_TTL)
+def fetch_clients(session: requests.Session) -> Tuple[Dict[str, dict], Dict[str, dict]]:
+    # Stream the body: rows are decoded one at a time and trimmed immediately,
+    # so the full user table never sits in memory as text plus a dict graph.
+    resp = session.get(
+        f"{UNIFI_HOST}/proxy/network/api/s/{UNIFI_SITE}/rest/user", stream=True
+    )
     resp.raise_for_status()
+    resp.raw.decode_content = True
+    # One pass builds both the client index and the display rows, each keyed by MAC.
+    index = {}
+    rows = {}
     try:
-        body = resp.json()
-    except (ValueError, json.JSONDecodeError):
+        for c in ijson.items(resp.raw, "data.item", use_float=True):
+            mac = c.get("mac")
+            if not mac:
+                continue
+            mac = normalize_mac(mac)
+            # Keep only what we read or write back; rest/user rows carry dozens of
+            # stat fields and the controller offers no server-side projection.
+            c = {k: c[k] for k in CLIENT_FIELDS if k in c}
+            index[mac] = c
+            hostname = c.get("hostname") or ""
+            rows[mac] = {
+                "mac": mac,
+                "name": c.get("name") or hostname,
+                "hostname": hostname,
+                "fixed_ip": c.get("fixed_ip") or "",
+                "use_fixedip": c.get("use_fixedip", False),
+            }
+    except ijson.JSONError:
         raise RuntimeError(
             f"UniFi returned non-JSON response (status {resp.status_code}, "
             f"content-type: {resp.headers.get('Content-Type', 'unknown')})"
         )
-    data = body.get("data", [])
-    return {c.get("mac", "").lower(): c for c in data if c.get("mac")}
+    finally:
+        resp.close()
+    return rows, index
+
+
+_DOCKER: Optional[docker.DockerClient] = None
+_DOCKER_LOCK = threading.Lock()
 
 
+def get_docker() -> docker.DockerClient:
+    """Return the shared Docker client, connecting on first use."""
+    global _DOCKER
+    with _DOCKER_LOCK:
+        if _DOCKER is None:
+            _DOCKER = docker.from_env(timeout=5)
+        return _DOCKER
+
+
+def reset_docker() -> None:
+    """Drop the shared client so the next call reconnects (e.g. daemon restart)."""
+    global _DOCKER
+    with _DOCKER_LOCK:
+        client, _DOCKER = _DOCKER, None
+    if client is not None:
+        client.close()
+
+
+@ttl_cache(CACHE_TTL)
 def get_containers() -> Tuple[List[dict], Dict[str, dict]]:
-    client = docker.from_env()
     containers = []
     index = {}
-    for c in client.containers.list():
-        networks = (c.attrs.get("NetworkSettings", {}) or {}).get("Networks", {}) or {}
+    # The low-level list is a single GET /containers/json that already carries
+    # NetworkSettings; containers.list() would inspect each container in turn.
+    # With DOCKER_NETWORK set the daemon drops bridge-only containers for us.
+    filters = {"network": DOCKER_NETWORK} if DOCKER_NETWORK else None
+    try:
+        listed = get_docker().api.containers(filters=filters)
+    except (docker.errors.APIError, requests.ConnectionError):
+        # The pooled socket may have gone stale; reconnect once.
+        reset_docker()
+        listed = get_docker().api.containers(filters=filters)
+    for c in listed:
+        name = ((c.get("Names") or [""])[0] or c.get("Id", "")[:12]).lstrip("/")
+        networks = (c.get("NetworkSettings", {}) or {}).get("Networks", {}) or {}
+        # One entry per (container, network) MAC: each network assigns its own
+        # MAC, so the index needs them all; pick_containers() later keeps the
+        # one UniFi actually knows.
         for net_name, net in networks.items():
             mac = net.get("MacAddress")
             ip = net.get("IPAddress")
             if not mac or not ip:
                 continue
             entry = {
-                "name": c.name,
+                "name": name,
                 "network": net_name,
-                "mac": mac.lower(),
+                "mac": normalize_mac(mac),
                 "ip": ip,
             }
             containers.append(entry)
@@ -128,7 +347,7 @@ def get_containers() -> Tuple[List[dict], Dict[str, dict]]:
 def upsert_client(
     session: requests.Session, container: dict, existing: Optional[dict]
 ) -> str:
-    mac = container["mac"].lower()
+    mac = container["mac"]
     network_id = (
         (existing or {}).get("network_id")
         or (existing or {}).get("network")
@@ -149,10 +368,11 @@ def upsert_client(
     }
 
     if existing:
-        payload = {**existing, **desired}
+        payload = existing.copy()
+        payload.update(desired)
         resp = session.put(
             f"{UNIFI_HOST}/proxy/network/api/s/{UNIFI_SITE}/rest/user/{existing['_id']}",
-            data=json.dumps(payload),
+            data=_dumps(payload),
         )
         resp.raise_for_status()
         return f"Updated {mac} -> {container['name']} @ {container['ip']}"
@@ -160,100 +380,264 @@ def upsert_client(
     payload = {"mac": mac, **desired}
     resp = session.post(
         f"{UNIFI_HOST}/proxy/network/api/s/{UNIFI_SITE}/rest/user",
-        data=json.dumps(payload),
+        data=_dumps(payload),
     )
     resp.raise_for_status()
     return f"Created {mac} -> {container['name']} @ {container['ip']}"
 
 
+# Latest (timestamp, get_containers(), fetch_clients()) from the refresher.
+_SNAPSHOT: Optional[tuple] = None
+# Bumped by invalidate_snapshot() so a refresh that read data before a write
+# can't store it afterwards.
+_SNAPSHOT_GEN = 0
+_SNAPSHOT_LOCK = threading.RLock()
+_REFRESH_NOW = threading.Event()
+
+
+def refresh_snapshot(refresh_clients: bool = True) -> None:
+    """Rebuild the snapshot; Docker-event wake-ups pass refresh_clients=False
+    so a container start/stop doesn't re-download the UniFi client table."""
+    global _SNAPSHOT
+    with _SNAPSHOT_LOCK:
+        gen = _SNAPSHOT_GEN
+    # Drop the TTL entries first so the snapshot (and the cache) get fresh data.
+    get_containers.invalidate()
+    if refresh_clients:
+        fetch_clients.invalidate()
+    containers = get_containers()
+    clients = with_session(fetch_clients)
+    with _SNAPSHOT_LOCK:
+        # A write landed mid-refresh; invalidate_snapshot() already queued a rerun.
+        if _SNAPSHOT_GEN == gen:
+            _SNAPSHOT = (time.monotonic(), containers, clients)
+
+
+def current_snapshot() -> Optional[tuple]:
+    """Return (containers, clients) if the refresher has a recent snapshot."""
+    with _SNAPSHOT_LOCK:
+        snapshot = _SNAPSHOT
+    if snapshot is None or time.monotonic() - snapshot[0] > 2 * REFRESH_SEC:
+        return None
+    return snapshot[1], snapshot[2]
+
+
+def invalidate_snapshot() -> None:
+    """Discard the snapshot after a write and ask the refresher to rebuild it."""
+    global _SNAPSHOT, _SNAPSHOT_GEN
+    # The client table changed; the rebuild (or a live request) must refetch it.
+    fetch_clients.invalidate()
+    with _SNAPSHOT_LOCK:
+        _SNAPSHOT = None
+        _SNAPSHOT_GEN += 1
+    _REFRESH_NOW.set()
+
+
+def _refresh_loop() -> None:
+    refresh_clients = True
+    while True:
+        try:
+            refresh_snapshot(refresh_clients)
+        except Exception:
+            # Requests fall back to the live path, which reports the error.
+            pass
+        # Only the timed cadence forces a UniFi refetch. Early wake-ups come from
+        # Docker events or from invalidate_snapshot(), which already dropped the
+        # cached client table itself.
+        refresh_clients = not _REFRESH_NOW.wait(REFRESH_SEC)
+        _REFRESH_NOW.clear()
+
+
+def _watch_docker_events() -> None:
+    """Refresh early when containers start/stop or change networks."""
+    while True:
+        try:
+            for _ in get_docker().events(
+                decode=True,
+                filters={
+                    "type": ["container", "network"],
+                    "event": ["start", "die", "rename", "connect", "disconnect"],
+                },
+            ):
+                get_containers.invalidate()
+                _REFRESH_NOW.set()
+        except Exception:
+            # The stream usually ends because the daemon went away; reconnect.
+            reset_docker()
+        time.sleep(REFRESH_SEC)
+
+
+def start_background_refresh() -> None:
+    if REFRESH_SEC <= 0 or ensure_configured():
+        return
+    threading.Thread(target=_refresh_loop, name="snapshot-refresh", daemon=True).start()
+    threading.Thread(target=_watch_docker_events, name="docker-events", daemon=True).start()
+
+
+start_background_refresh()
+
+
+def pick_containers(containers: List[dict], router_rows: Dict[str, dict]) -> List[dict]:
+    """Reduce get_containers() to one entry per container.
+
+    Prefers the network whose MAC UniFi knows, then DOCKER_NETWORK, then
+    anything but Docker's NAT bridge (whose MAC never reaches the router).
+    """
+    picked: Dict[str, Tuple[tuple, dict]] = {}
+    for entry in containers:
+        rank = (
+            entry["mac"] in router_rows,
+            entry["network"] == DOCKER_NETWORK,
+            entry["network"] != "bridge",
+        )
+        best = picked.get(entry["name"])
+        if best is None or rank > best[0]:
+            picked[entry["name"]] = (rank, entry)
+    return [entry for _, entry in picked.values()]
+
+
 @app.route("/api/status")
 def api_status():
     cfg_error = ensure_configured()
     if cfg_error:
         return jsonify({"error": cfg_error}), 500
 
+    snapshot = current_snapshot()
+    if snapshot:
+        (containers, _), (router_rows, _) = snapshot
+    else:
+        containers_future = _EXECUTOR.submit(get_containers)
+        clients_future = _EXECUTOR.submit(with_session, fetch_clients)
+
+        try:
+            containers, _ = containers_future.result()
+        except Exception as exc:
+            return jsonify({"error": f"Unable to list Docker containers: {exc}"}), 502
+
+        try:
+            router_rows, _ = clients_future.result()
+        except requests.HTTPError as exc:
+            detail = ""
+            if exc.response is not None:
+                detail = f" (body: {exc.response.text})"
+            return (
+                jsonify({"error": f"UniFi API error: {exc} {detail}".strip()}),
+                exc.response.status_code if exc.response is not None else 502,
+            )
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            return jsonify({"error": f"Unable to connect to UniFi: {exc}"}), 504
+        except Exception as exc:
+            return jsonify({"error": f"Unable to reach UniFi: {exc}"}), 502
+
+    # Only MACs known to both sides are actionable; intersect here so the
+    # browser gets just those rows rather than the whole client table.
+    containers = pick_containers(containers, router_rows)
+    matches = sorted(
+        (
+            {"mac": c["mac"], "container": c, "router": router_rows[c["mac"]]}
+            for c in containers
+            if c["mac"] in router_rows
+        ),
+        key=lambda m: m["mac"],
+    )
+    resp = {
+        "matches": matches,
+        "configured": True,
+        "verify_ssl": VERIFY_SSL,
+        "unifi_host": UNIFI_HOST,
+    }
+    if request.args.get("full") == "1":
+        resp["containers"] = containers
+        resp["router_clients"] = list(router_rows.values())
+
+    # Between UniFi refreshes the body is usually unchanged; let the browser revalidate.
+    body = orjson.dumps(resp)
+    out = Response(body, mimetype="application/json")
+    out.set_etag(hashlib.blake2b(body, digest_size=8).hexdigest())
+    out.headers["Cache-Control"] = "no-cache"
+    return out.make_conditional(request)
+
+
+@app.route("/api/apply", methods=["POST"])
+def api_apply():
+    cfg_error = ensure_configured()
+    if cfg_error:
+        return jsonify({"error": cfg_error}), 500
+
+    body = request.get_json(force=True, silent=True)
+    mac = body.get("mac") if isinstance(body, dict) else None
+    if not mac or not isinstance(mac, str):
+        return jsonify({"error": "mac is required"}), 400
+    mac = normalize_mac(mac)
+
     try:
-        containers, _ = get_containers()
+        containers, container_index = get_containers()
     except Exception as exc:
         return jsonify({"error": f"Unable to list Docker containers: {exc}"}), 502
 
-    session = build_session()
+    container = container_index.get(mac)
+    if not container:
+        return jsonify({"error": f"No running container with MAC {mac}"}), 404
+
     try:
-        login(session)
-        # Optional second login for controllers that require Network app auth.
-        try:
-            login_network(session)
-        except Exception:
-            # If network login fails but main login succeeded, continue; errors bubble below.
-            pass
-        clients = fetch_clients(session)
+        _, clients = with_session(fetch_clients)
+        existing = clients.get(mac)
+        message = with_session(upsert_client, container, existing)
+        # The client table changed; don't serve the stale copy on the next refresh.
+        invalidate_snapshot()
+        return jsonify({"ok": True, "message": message})
     except requests.HTTPError as exc:
         detail = ""
         if exc.response is not None:
             detail = f" (body: {exc.response.text})"
         return (
-            jsonify({"error": f"UniFi API error: {exc} {detail}".strip()}),
+            jsonify({"error": f"{exc} {detail}".strip()}),
             exc.response.status_code if exc.response is not None else 502,
         )
     except (requests.ConnectionError, requests.Timeout) as exc:
         return jsonify({"error": f"Unable to connect to UniFi: {exc}"}), 504
     except Exception as exc:
-        return jsonify({"error": f"Unable to reach UniFi: {exc}"}), 502
+        return jsonify({"error": str(exc)}), 502
 
-    router_list = []
-    for mac, data in clients.items():
-        router_list.append(
-            {
-                "mac": mac,
-                "name": data.get("name") or data.get("hostname") or "",
-                "hostname": data.get("hostname") or "",
-                "fixed_ip": data.get("fixed_ip") or "",
-                "use_fixedip": data.get("use_fixedip", False),
-            }
-        )
 
-    return jsonify(
-        {
-            "containers": containers,
-            "router_clients": router_list,
-            "configured": True,
-            "verify_ssl": VERIFY_SSL,
-            "unifi_host": UNIFI_HOST,
-        }
-    )
+def _apply_mac(mac: str, container_index: Dict[str, dict], clients: Dict[str, dict]) -> dict:
+    container = container_index.get(mac)
+    if not container:
+        return {"mac": mac, "ok": False, "error": f"No running container with MAC {mac}"}
+    try:
+        message = with_session(upsert_client, container, clients.get(mac))
+        return {"mac": mac, "ok": True, "message": message}
+    except requests.HTTPError as exc:
+        detail = ""
+        if exc.response is not None:
+            detail = f" (body: {exc.response.text})"
+        return {"mac": mac, "ok": False, "error": f"{exc} {detail}".strip()}
+    except Exception as exc:
+        return {"mac": mac, "ok": False, "error": str(exc)}
 
 
-@app.route("/api/apply", methods=["POST"])
-def api_apply():
+@app.route("/api/apply_bulk", methods=["POST"])
+def api_apply_bulk():
     cfg_error = ensure_configured()
     if cfg_error:
         return jsonify({"error": cfg_error}), 500
 
-    body = request.get_json(force=True, silent=True) or {}
-    mac = (body.get("mac") or "").lower()
-    if not mac:
-        return jsonify({"error": "mac is required"}), 400
+    body = request.get_json(force=True, silent=True)
+    macs = body.get("macs") if isinstance(body, dict) else None
+    if not isinstance(macs, list):
+        return jsonify({"error": "macs must be a list of MAC addresses"}), 400
+    # Dedupe (keeping order) so the same client is never written twice at once.
+    macs = list(dict.fromkeys(normalize_mac(m) for m in macs if isinstance(m, str) and m))
+    if not macs:
+        return jsonify({"error": "macs is required"}), 400
 
     try:
-        containers, container_index = get_containers()
+        _, container_index = get_containers()
     except Exception as exc:
         return jsonify({"error": f"Unable to list Docker containers: {exc}"}), 502
 
-    container = container_index.get(mac)
-    if not container:
-        return jsonify({"error": f"No running container with MAC {mac}"}), 404
-
-    session = build_session()
     try:
-        login(session)
-        try:
-            login_network(session)
-        except Exception:
-            pass
-        clients = fetch_clients(session)
-        existing = clients.get(mac)
-        message = upsert_client(session, container, existing)
-        return jsonify({"ok": True, "message": message})
+        _, clients = with_session(fetch_clients)
     except requests.HTTPError as exc:
         detail = ""
         if exc.response is not None:
@@ -267,11 +651,29 @@ def api_apply():
     except Exception as exc:
         return jsonify({"error": str(exc)}), 502
 
+    # UniFi's rest/user has no batch write; fan the per-client writes out over
+    # the shared session's connection pool instead of one round at a time.
+    results = list(
+        _BULK_EXECUTOR.map(
+            functools.partial(_apply_mac, container_index=container_index, clients=clients),
+            macs,
+        )
+    )
 
-@app.route("/")
-def index():
-    return render_template_string(
-        """
+    applied = sum(1 for r in results if r["ok"])
+    if applied:
+        invalidate_snapshot()
+    return jsonify(
+        {
+            "ok": applied == len(results),
+            "message": f"Applied {applied} of {len(results)} clients.",
+            "results": results,
+        }
+    )
+
+
+# The page has no template variables, so it is built once instead of per request.
+INDEX_HTML = """
 <!doctype html>
 <html lang="en">
   <head>
@@ -332,7 +734,7 @@ def index():
   <body>
     <h1 style="display:flex; align-items:center; gap:12px;">
       <span>Unraid <-> UniFi Docker Mapper</span>
-      <button class="btn" style="padding:6px 12px;" onclick="loadData()">Refresh</button>
+      <button class="btn" style="padding:6px 12px;" onclick="refresh()">Refresh</button>
     </h1>
     <div class="status" id="status">Loading...</div>
     <div style="display:flex; gap:12px; align-items:center; margin-bottom:12px;">
@@ -344,7 +746,10 @@ def index():
       </select>
     </div>
     <div class="card">
-      <h2>MAC-aligned view</h2>
+      <h2 style="display:flex; align-items:center; justify-content:space-between;">
+        <span>MAC-aligned view</span>
+        <button class="btn" id="applyAll" title="Apply every visible row to UniFi" onclick="applyAll()" disabled>Approve All</button>
+      </h2>
       <div class="row label">
         <div>Unraid (name / IP / MAC)</div><div>UniFi (name / IP / MAC)</div><div>Action</div>
       </div>
@@ -356,7 +761,9 @@ def index():
       const rowsEl = document.getElementById("rows");
       const searchEl = document.getElementById("search");
       const filterEl = document.getElementById("filter");
+      const applyAllEl = document.getElementById("applyAll");
       let dataCache = null;
+      let visibleMacs = [];
 
       function rowTemplate(cols) {
         return `<div class="row">${cols.map(col => `<div>${col || ""}</div>`).join("")}</div>`;
@@ -368,7 +775,27 @@ def index():
         catch { throw new Error(res.ok ? "Invalid JSON from server" : `HTTP ${res.status}: ${text.slice(0, 200)}`); }
       }
 
+      // No auto-poll on purpose: UniFi only refreshes client stats every ~30s,
+      // so data is loaded on page open and on Refresh, and approvals patch rows locally.
+      const REFRESH_COOLDOWN_MS = 5000;
+      let lastLoad = 0;
+
+      function refresh() {
+        if (Date.now() - lastLoad < REFRESH_COOLDOWN_MS) return;
+        loadData();
+      }
+
+      // Reflect an approved match locally instead of re-fetching /api/status.
+      function markApplied(mac) {
+        const match = dataCache && (dataCache.matches || []).find(m => m.mac === mac);
+        if (!match) return;
+        match.router.name = match.container.name;
+        match.router.fixed_ip = match.container.ip;
+        match.router.use_fixedip = true;
+      }
+
       async function loadData() {
+        lastLoad = Date.now();
         statusEl.textContent = "Loading...";
         try {
           const res = await fetch("/api/status");
@@ -384,23 +811,12 @@ def index():
       }
 
       function renderRows(data) {
-        const containers = data.containers || [];
-        const router = (data.router_clients || []).filter(r => r.mac);
-
-        const containerByMac = {};
-        const routerByMac = {};
-
-        containers.forEach(c => containerByMac[c.mac] = c);
-        router.forEach(r => routerByMac[r.mac] = r);
-
-        // Only show MACs that exist in both Unraid and UniFi.
-        const intersection = Object.keys(containerByMac).filter(mac => routerByMac[mac]).sort();
+        // The server only sends MACs that exist in both Unraid and UniFi.
+        const matches = data.matches || [];
         const query = (searchEl.value || "").toLowerCase().trim();
         const scope = filterEl.value || "all";
 
-        const filtered = intersection.filter(mac => {
-          const c = containerByMac[mac];
-          const r = routerByMac[mac];
+        const filtered = matches.filter(({container: c, router: r}) => {
           const hayC = c ? `${c.name} ${c.ip} ${c.mac}`.toLowerCase() : "";
           const hayR = r ? `${r.name || ""} ${r.hostname || ""} ${r.fixed_ip || ""} ${r.mac}`.toLowerCase() : "";
           const hitC = query ? hayC.includes(query) : true;
@@ -410,10 +826,11 @@ def index():
           return hitC || hitR;
         });
 
+        visibleMacs = filtered.map(m => m.mac);
+        applyAllEl.disabled = !filtered.length;
+
         rowsEl.innerHTML = filtered.length
-          ? filtered.map(mac => {
-              const c = containerByMac[mac];
-              const r = routerByMac[mac];
+          ? filtered.map(({mac, container: c, router: r}) => {
               const containerCol = `<strong>${c.name}</strong><div class="pill">${c.ip}</div><div class="pill">${c.mac}</div>`;
               const routerCol = `<strong>${r.name || r.hostname || "—"}</strong><div class="pill">${r.fixed_ip || "—"}</div><div class="pill">${mac}</div>`;
               return rowTemplate([
@@ -441,7 +858,32 @@ def index():
           const data = await parseJSON(res);
           if (!res.ok) throw new Error(data.error || res.statusText);
           statusEl.textContent = data.message || "Updated.";
-          await loadData();
+          markApplied(mac);
+          renderRows(dataCache);
+        } catch (err) {
+          statusEl.innerHTML = `<span class="error">${err.message}</span>`;
+        }
+      }
+
+      async function applyAll() {
+        if (!visibleMacs.length) return;
+        statusEl.textContent = `Applying ${visibleMacs.length} clients...`;
+        try {
+          const res = await fetch("/api/apply_bulk", {
+            method: "POST",
+            headers: {"Content-Type": "application/json"},
+            body: JSON.stringify({macs: visibleMacs})
+          });
+          const data = await parseJSON(res);
+          if (!res.ok) throw new Error(data.error || res.statusText);
+          (data.results || []).filter(r => r.ok).forEach(r => markApplied(r.mac));
+          renderRows(dataCache);
+          const failed = (data.results || []).filter(r => !r.ok);
+          if (failed.length) {
+            statusEl.innerHTML = `<span class="error">${data.message} ${failed.map(r => `${r.mac}: ${r.error}`).join("; ")}</span>`;
+          } else {
+            statusEl.textContent = data.message || "Updated.";
+          }
         } catch (err) {
           statusEl.innerHTML = `<span class="error">${err.message}</span>`;
         }
@@ -451,8 +893,17 @@ def index():
     </script>
   </body>
 </html>
-        """
-    )
+"""
+INDEX_ETAG = hashlib.blake2b(INDEX_HTML.encode("utf-8"), digest_size=8).hexdigest()
+
+
+@app.route("/")
+def index():
+    resp = Response(INDEX_HTML, mimetype="text/html")
+    resp.set_etag(INDEX_ETAG)
+    # Revalidate every load (a cheap 304) so an upgrade never runs old JS against a new API.
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp.make_conditional(request)
 
 
 if __name__ == "__main__":